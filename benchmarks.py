@@ -0,0 +1,100 @@
+"""
+Informal performance benchmarks.
+Run command - python benchmarks.py
+"""
+
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from variable_array import VariableArray
+from graph import Graph
+from learn import gradient_descent, optimize
+from optimizers import SGD, Nesterov, RMSProp, Adam
+from learn_problem import LEARN_X, LEARN_Y, LEARN_W, LEARN_E
+
+# The error gradient_descent reaches after 10 iterations on the tests.LearnTestCase problem.
+LEARN_TARGET = LEARN_E[-1]
+
+def network_error(W, X, Y):
+    """
+    Builds the sum of squared errors of a one hidden layer tanh network.
+    W is a list of two VariableArrays; X and Y are numpy.ndarrays of inputs and targets.
+    Uses Python's sum rather than numpy.sum to produce a single Variable.
+    """
+    return sum(((W[1].dot(np.tanh(W[0].dot(X))) - Y)**2).flat)
+
+def benchmark_threads(num_hidden=16, num_samples=32, num_calls=200, workers=(1, 2, 4, 8)):
+    """
+    Measures the throughput of concurrent Graph.derivative calls on a thread pool.
+    A single Graph is shared by all threads, and each call supplies its own parameter values.
+    Prints the number of calls per second for each number of worker threads.
+    """
+    X = np.random.randn(2, num_samples)
+    Y = np.random.randn(2, num_samples)
+    W = [VariableArray(np.random.randn(num_hidden, 2)),
+         VariableArray(np.random.randn(2, num_hidden))]
+    graph = Graph(network_error(W, X, Y))
+    contexts = [[(W[0], np.random.randn(num_hidden, 2)), (W[1], np.random.randn(2, num_hidden))]
+                for c in range(num_calls)]
+
+    def call(context):
+        values = graph.forward(context)
+        return values[graph.roots[0]], graph.backward(values, W)
+
+    print("thread pool: %d nodes, %d calls" % (len(graph.values), num_calls))
+    for num_workers in workers:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            start = time.perf_counter()
+            list(executor.map(call, contexts))
+            elapsed = time.perf_counter() - start
+        print("  %2d workers: %8.1f calls/s" % (num_workers, num_calls / elapsed))
+
+def benchmark_optimizers(max_iters=100):
+    """
+    Measures time-to-target-error on the tests.LearnTestCase problem.
+    The target is the error learn.gradient_descent reaches after 10 iterations.
+    For each method, prints the number of iterations and the time taken to reach the target.
+    """
+    def error_function(parameters):
+        return network_error(parameters, LEARN_X, LEARN_Y)
+
+    def first_below(errors):
+        for i, e in enumerate(errors):
+            if e <= LEARN_TARGET + 1e-9:
+                return i
+        return None
+
+    print("time to error %f on LearnTestCase" % LEARN_TARGET)
+
+    # gradient_descent's graph grows every iteration, so only run the 10 iterations needed.
+    start = time.perf_counter()
+    errors = gradient_descent([VariableArray(w) for w in LEARN_W], error_function,
+                              num_iters=10, learning_rate=0.01)
+    elapsed = time.perf_counter() - start
+    iters = first_below([e.evaluate() for e in errors])
+    print("  %-26s %4s iters %8.4f s" % ("gradient_descent(0.01)", iters, elapsed))
+
+    optimizers = [
+        ("SGD(0.01)", lambda: SGD(0.01)),
+        ("SGD(0.01, momentum=0.9)", lambda: SGD(0.01, momentum=0.9)),
+        ("Nesterov(0.01)", lambda: Nesterov(0.01)),
+        ("RMSProp(0.05)", lambda: RMSProp(0.05)),
+        ("Adam(0.1)", lambda: Adam(0.1)),
+    ]
+    for name, make_optimizer in optimizers:
+        errors = optimize([VariableArray(w) for w in LEARN_W], error_function,
+                          make_optimizer(), num_iters=max_iters)
+        iters = first_below(errors)
+        if iters is None:
+            print("  %-26s did not reach target in %d iters" % (name, max_iters))
+            continue
+        start = time.perf_counter()
+        optimize([VariableArray(w) for w in LEARN_W], error_function,
+                 make_optimizer(), num_iters=iters + 1)
+        elapsed = time.perf_counter() - start
+        print("  %-26s %4d iters %8.4f s" % (name, iters, elapsed))
+
+if __name__ == "__main__":
+
+    benchmark_threads()
+    benchmark_optimizers()
@@ -0,0 +1,211 @@
+"""
+Provides Graph, an immutable compiled form of a Variable dependency graph.
+A Graph is built once from a dependent Variable or VariableArray.
+It can then be evaluated and differentiated for different independent variable values
+without assigning to, or otherwise modifying, the Variables it was built from.
+
+Each call to Graph.evaluate or Graph.derivative takes a "context":
+a dictionary mapping independent Variables to the values they should take for that call only,
+or a list of (v, value) pairs where v may also be a VariableArray (VariableArrays are not hashable).
+Variables not in the context keep the values they had when the Graph was built.
+All intermediate values live in arrays local to the call,
+so a single Graph can be shared by many threads without locks.
+
+Nodes are grouped by depth and by d_op, and each group is computed with one numpy operation.
+Values are computed forwards through the groups.
+Derivatives are accumulated backwards through the groups (reverse-mode),
+so one call yields the derivative with respect to every independent variable.
+Graphs built with Python arithmetic (such as sum over a VariableArray) are mostly long serial
+chains, giving many groups of only one or two nodes. Each call then spends most of its time
+in Python holding the GIL, so sharing a Graph between threads is safe but not faster.
+"""
+
+import numpy as np
+from serialize import topological_order, flatten, OP_CODES
+from chain import *
+from variable_array import VariableArray
+
+NEG, ADD, SUB, MUL, TRUEDIV, POW, TANH = [OP_CODES[d_op] for d_op in
+    (d_neg, d_add, d_sub, d_mul, d_truediv, d_pow, d_tanh)]
+
+class Graph(object):
+
+    def __init__(self, root):
+        """
+        Compiles the dependency graph of root, a Variable or VariableArray.
+        Raises an error if root depends on a d_op that Graph does not support.
+        """
+        if isinstance(root, VariableArray):
+            self.shape = root.shape
+            roots = list(root.flat)
+        else:
+            self.shape = None
+            roots = [root]
+        nodes = topological_order(roots)
+        ops, operands, values, self.roots = flatten(roots, nodes)
+        self.index = dict((id(node), n) for n, node in enumerate(nodes))
+        self.ops = ops
+        self.values = values
+        # Keep the Variables alive so that their ids in self.index stay valid.
+        self.nodes = nodes
+
+        depth = [0] * len(nodes)
+        for n, (op, node_operands) in enumerate(zip(ops.tolist(), operands.tolist())):
+            if op != 0:
+                depth[n] = 1 + max(depth[o] for o in node_operands if o >= 0)
+        depth = np.array(depth, dtype=np.int64)
+        self.schedule = []
+        for d in range(1, depth.max() + 1):
+            level = depth == d
+            for code in np.unique(ops[level]):
+                group = np.flatnonzero(level & (ops == code))
+                self.schedule.append((code, group, operands[group, 0], operands[group, 1]))
+
+        for array in [self.ops, self.values, self.roots]:
+            array.flags.writeable = False
+        for code, group, a, b in self.schedule:
+            for array in [group, a, b]:
+                array.flags.writeable = False
+
+    def indices(self, v):
+        """
+        Returns the node indices of a Variable or VariableArray v as a numpy.ndarray.
+        Variables that are not part of self are given index -1.
+        """
+        if isinstance(v, VariableArray):
+            return np.array([self.index.get(id(x), -1) for x in v.flat]).reshape(v.shape)
+        return np.array(self.index.get(id(v), -1))
+
+    def forward(self, context=None):
+        """
+        Computes the values of every node in self, given a context.
+        context is a dictionary or a list of (v, value) pairs, as described above.
+        Returns a new numpy.ndarray of floats with one value per node.
+        Raises an error if the context assigns to a dependent variable.
+        """
+        values = self.values.copy()
+        if context is not None:
+            if isinstance(context, dict):
+                context = context.items()
+            for v, value in context:
+                indices = self.indices(v)
+                value = np.broadcast_to(np.asarray(value, dtype=float), indices.shape)
+                present = indices >= 0
+                if np.any(self.ops[indices[present]] != 0):
+                    raise(Exception("Cannot assign to dependent variable"))
+                values[indices[present]] = value[present]
+        for code, group, a, b in self.schedule:
+            x = values[a]
+            if code == NEG:
+                values[group] = -x
+            elif code == TANH:
+                values[group] = np.tanh(x)
+            else:
+                y = values[b]
+                if code == ADD:
+                    values[group] = x + y
+                elif code == SUB:
+                    values[group] = x - y
+                elif code == MUL:
+                    values[group] = x * y
+                elif code == TRUEDIV:
+                    values[group] = x / y
+                elif code == POW:
+                    values[group] = x ** y
+        return values
+
+    def evaluate(self, context=None):
+        """
+        Returns the value of self's root given a context.
+        Returns a float if the root is a Variable,
+        or a numpy.ndarray of floats if the root is a VariableArray.
+        """
+        values = self.forward(context)[self.roots]
+        if self.shape is None:
+            return float(values[0])
+        return values.reshape(self.shape)
+
+    def derivative(self, v, context=None):
+        """
+        Evaluates the derivative of self's root with respect to v, given a context.
+        v should be a Variable or a VariableArray.
+        Returns a float if v is a Variable,
+        or a numpy.ndarray of floats with the same shape as v if v is a VariableArray.
+        Variables that self's root does not depend on have derivative 0.
+        Raises an error if self's root is a VariableArray.
+        """
+        return self.gradients([v], context)[0]
+
+    def gradients(self, vs, context=None):
+        """
+        Evaluates the derivatives of self's root with respect to each element of a list vs.
+        Returns a list with one entry per element of vs, as returned by derivative.
+        All the derivatives are computed from a single backwards pass.
+        Raises an error if self's root is a VariableArray.
+        """
+        return self.backward(self.forward(context), vs)
+
+    def backward(self, values, vs):
+        """
+        Evaluates the derivatives of self's root with respect to each element of a list vs,
+        given values returned by forward.
+        Returns a list as for gradients.
+        Lets a caller use one forward pass for both the root's value and its derivatives.
+        Raises an error if self's root is a VariableArray.
+        """
+        if self.shape is not None:
+            raise(Exception("Cannot differentiate a VariableArray"))
+        adjoints = np.zeros(len(values))
+        adjoints[self.roots[0]] = 1.
+        for code, group, a, b in reversed(self.schedule):
+            g = adjoints[group]
+            x = values[a]
+            if code == NEG:
+                np.add.at(adjoints, a, -g)
+            elif code == TANH:
+                np.add.at(adjoints, a, g * (1 - np.tanh(x) ** 2))
+            else:
+                y = values[b]
+                if code == ADD:
+                    np.add.at(adjoints, a, g)
+                    np.add.at(adjoints, b, g)
+                elif code == SUB:
+                    np.add.at(adjoints, a, g)
+                    np.add.at(adjoints, b, -g)
+                elif code == MUL:
+                    np.add.at(adjoints, a, g * y)
+                    np.add.at(adjoints, b, g * x)
+                elif code == TRUEDIV:
+                    np.add.at(adjoints, a, g / y)
+                    np.add.at(adjoints, b, -g * x / y ** 2)
+                elif code == POW:
+                    np.add.at(adjoints, a, g * y * x ** (y - 1))
+                    # As in chain.d_pow, the log term is only used for positive bases.
+                    positive = x > 0
+                    np.add.at(adjoints, b[positive],
+                        g[positive] * x[positive] ** y[positive] * np.log(x[positive]))
+        gradients = []
+        for v in vs:
+            indices = self.indices(v)
+            gradient = np.where(indices >= 0, adjoints[indices], 0.)
+            if isinstance(v, VariableArray):
+                gradients.append(gradient)
+            else:
+                gradients.append(float(gradient))
+        return gradients
+
+if __name__ == "__main__":
+
+    """
+    Scratch pad for informal testing.
+    You can edit the following without affecting the tests.
+    """
+
+    x = VariableArray(np.array([1., 2., 3.]))
+    y = x[0] * x[1] + (x[2] ** 2).tanh()
+    g = Graph(y)
+    print(g.evaluate(), y.evaluate())
+    print(g.derivative(x), x.gradient(y))
+    print(g.evaluate([(x, np.zeros(3))]), g.derivative(x, [(x, np.zeros(3))]))
+    print(g.derivative(x[2], {x[0]: 5.}))
+    print(x)
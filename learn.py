@@ -1,8 +1,13 @@
 """
-Provides a basic gradient descent algorithm for learning.
+Provides a basic gradient descent algorithm for learning,
+and optimize, which learns with any of the optimizers in optimizers.py.
 """
 
-def gradient_descent(parameters, error_function, num_iters, learning_rate, verbose=False):
+import numpy as np
+from variable_array import VariableArray
+from graph import Graph
+
+def gradient_descent(parameters, error_function, num_iters, learning_rate, verbose=False, callback=None):
     """
     Uses gradient descent to find parameters that minimize training error.
     Parameters should be a list of Variables and/or VariableArrays.
@@ -12,12 +17,16 @@ def gradient_descent(parameters, error_function, num_iters, learning_rate, verbo
     num_iters is the number of gradient descent iterations to perform.
     learning_rate is a fixed learning rate for the gradient descent.
     If verbose is true, prints the current error at each iteration.
+    If callback is given, callback(i, e) is called at each iteration,
+    and gradient descent stops early if it returns True.
     Returns a list errors, where error[i] is e at the start of the i^{th} iteration.
     """
     errors = []
     for i in range(0,num_iters):
         e = error_function(parameters)
         errors.append(e)
+        if callback is not None and callback(i, e):
+            break
         for p in range(0,len(parameters)):
             parameters[p] = parameters[p] - learning_rate * parameters[p].gradient(e)
         if verbose:
@@ -25,6 +34,43 @@ def gradient_descent(parameters, error_function, num_iters, learning_rate, verbo
     return errors
     #raise(NotImplementedError)
 
+def optimize(parameters, error_function, optimizer, num_iters, verbose=False):
+    """
+    Uses an optimizer to find parameters that minimize training error.
+    Parameters should be a list of independent Variables and/or VariableArrays.
+    error_function is as for gradient_descent.
+    It is called only once, and must build the same graph for any parameter values.
+    optimizer should be an optimizers.Optimizer, such as optimizers.Adam(0.01).
+    num_iters is the number of optimizer steps to perform.
+    If verbose is true, prints the current error at each iteration.
+    The parameters are updated in place using assign after every step,
+    so the same objects hold the learned values.
+    Returns a list errors, where error[i] is the error (a float) at the start of the i^{th} iteration.
+    """
+    graph = Graph(error_function(parameters))
+    values = [np.array(p.evaluate(), dtype=float) for p in parameters]
+    optimizer.allocate(values)
+    errors = []
+    for i in range(0,num_iters):
+        context = list(zip(parameters, values))
+        node_values = graph.forward(context)
+        e = float(node_values[graph.roots[0]])
+        errors.append(e)
+        gradients = graph.backward(node_values, parameters)
+        for p in range(0,len(gradients)):
+            # Scalar Variables give float gradients; optimizers need arrays to update in place.
+            if not isinstance(gradients[p], np.ndarray):
+                gradients[p] = np.array(gradients[p])
+        optimizer.step(values, gradients)
+        for p, value in zip(parameters, values):
+            if isinstance(p, VariableArray):
+                p.assign(value)
+            else:
+                p.assign(float(value))
+        if verbose:
+            print (i,e)
+    return errors
+
 if __name__ == "__main__":
 
     """
@@ -0,0 +1,30 @@
+"""
+Provides the training problem from tests.LearnTestCase as numpy.ndarrays,
+for reuse by other tests and by the benchmarks.
+LEARN_X and LEARN_Y are the training inputs and targets of a one hidden layer tanh network,
+LEARN_W are the initial values of its two weight matrices,
+and LEARN_E are the errors learn.gradient_descent reaches with learning_rate 0.01,
+where LEARN_E[i] is the error at the start of the i^{th} iteration.
+"""
+
+import numpy as np
+
+LEARN_X = np.array([[-0.55427249,  0.40034063, -1.40994713,  0.51925678],
+                    [ 0.34043718,  0.02484774,  1.02835799,  0.50503202]])
+LEARN_Y = np.array([[ 1.13055928, -0.90340322,  1.90165584, -1.09158475],
+                    [ 0.29670035, -0.25619711,  0.46959747, -0.33156514]])
+LEARN_W = [np.array([[-0.50043522, -0.15420026],
+                     [ 0.34272670,  0.24172611]]),
+           np.array([[ 1.17618063,  1.2767736 ],
+                     [ 0.96057281, -0.66617526]])]
+LEARN_E = np.array([
+    5.551991873935021,
+    4.025973161047319,
+    2.981961622205049,
+    2.2746022766135265,
+    1.787089056993292,
+    1.44064870266597,
+    1.1863588179760975,
+    0.9942344318783873,
+    0.8455163235626736,
+    0.7280748922416285])
@@ -0,0 +1,144 @@
+"""
+Provides optimizers for use with learn.optimize.
+An optimizer updates parameter values in place, given their gradients.
+Parameter values and gradients are lists of numpy.ndarrays of floats,
+one per parameter, shaped like the corresponding Variable or VariableArray.
+Any state an optimizer keeps (momentum, running averages) is held in float arrays
+allocated once by allocate and then updated in place at every step.
+
+To add a new optimizer, subclass Optimizer and override allocate and step.
+"""
+
+import numpy as np
+
+class Optimizer(object):
+
+    def __init__(self, learning_rate):
+        """
+        Initialize a new optimizer with a given learning rate.
+        """
+        self.learning_rate = learning_rate
+        self.scratch = None
+
+    def allocate(self, values):
+        """
+        Allocates the optimizer's state for parameters with the given values.
+        Must be called before the first step.
+        The base class allocates one scratch array per parameter for temporary results.
+        """
+        self.scratch = [np.zeros_like(value) for value in values]
+
+    def step(self, values, gradients):
+        """
+        Updates each array of parameter values in place using its gradient.
+        The gradient arrays may be overwritten.
+        """
+        raise(NotImplementedError)
+
+class SGD(Optimizer):
+
+    def __init__(self, learning_rate, momentum=0.):
+        """
+        Stochastic gradient descent with (classical) momentum.
+        With momentum 0 this is the fixed-step gradient descent of learn.gradient_descent.
+        """
+        Optimizer.__init__(self, learning_rate)
+        self.momentum = momentum
+
+    def allocate(self, values):
+        Optimizer.allocate(self, values)
+        self.velocity = [np.zeros_like(value) for value in values]
+
+    def step(self, values, gradients):
+        for p, g, v in zip(values, gradients, self.velocity):
+            # v = momentum * v - learning_rate * g; p += v
+            v *= self.momentum
+            g *= self.learning_rate
+            v -= g
+            p += v
+
+class Nesterov(SGD):
+
+    def __init__(self, learning_rate, momentum=0.9):
+        """
+        Gradient descent with Nesterov momentum.
+        Uses the reformulation that only needs the gradient at the current parameter values.
+        """
+        SGD.__init__(self, learning_rate, momentum)
+
+    def step(self, values, gradients):
+        for p, g, v, s in zip(values, gradients, self.velocity, self.scratch):
+            # v' = momentum * v - learning_rate * g; p += v' + momentum * (v' - v)
+            s[...] = v
+            v *= self.momentum
+            g *= self.learning_rate
+            v -= g
+            np.subtract(v, s, out=s)
+            s *= self.momentum
+            s += v
+            p += s
+
+class RMSProp(Optimizer):
+
+    def __init__(self, learning_rate=0.001, decay=0.9, epsilon=1e-8):
+        """
+        RMSProp: scales each gradient by a running average of its squared magnitude.
+        """
+        Optimizer.__init__(self, learning_rate)
+        self.decay = decay
+        self.epsilon = epsilon
+
+    def allocate(self, values):
+        Optimizer.allocate(self, values)
+        self.mean_square = [np.zeros_like(value) for value in values]
+
+    def step(self, values, gradients):
+        for p, g, m, s in zip(values, gradients, self.mean_square, self.scratch):
+            # m = decay * m + (1 - decay) * g**2; p -= learning_rate * g / (sqrt(m) + epsilon)
+            m *= self.decay
+            np.multiply(g, g, out=s)
+            s *= 1 - self.decay
+            m += s
+            np.sqrt(m, out=s)
+            s += self.epsilon
+            g /= s
+            g *= self.learning_rate
+            p -= g
+
+class Adam(Optimizer):
+
+    def __init__(self, learning_rate=0.001, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        """
+        Adam: momentum and RMSProp-style scaling, with bias correction of both running averages.
+        """
+        Optimizer.__init__(self, learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+
+    def allocate(self, values):
+        Optimizer.allocate(self, values)
+        self.mean = [np.zeros_like(value) for value in values]
+        self.mean_square = [np.zeros_like(value) for value in values]
+        self.t = 0
+
+    def step(self, values, gradients):
+        self.t += 1
+        correction1 = 1 - self.beta1 ** self.t
+        correction2 = 1 - self.beta2 ** self.t
+        for p, g, m, v, s in zip(values, gradients, self.mean, self.mean_square, self.scratch):
+            # m = beta1 * m + (1 - beta1) * g; v = beta2 * v + (1 - beta2) * g**2
+            m *= self.beta1
+            np.multiply(g, 1 - self.beta1, out=s)
+            m += s
+            v *= self.beta2
+            np.multiply(g, g, out=s)
+            s *= 1 - self.beta2
+            v += s
+            # p -= learning_rate * (m / correction1) / (sqrt(v / correction2) + epsilon)
+            np.sqrt(v, out=s)
+            s /= np.sqrt(correction2)
+            s += self.epsilon
+            np.divide(m, s, out=s)
+            s *= self.learning_rate / correction1
+            p -= s
@@ -0,0 +1,167 @@
+"""
+Provides compact binary serialization of Variable graphs and VariableArrays.
+A graph is stored as three flat arrays, one entry per Variable node:
+an op-code array, an operand-index array and a value array.
+The op-code identifies the node's d_op (or 0 for an independent variable).
+The operand-index array holds the indices of each node's operands, padded with -1.
+Nodes are stored in topological order, so every operand precedes the nodes using it.
+
+Several named Variables and VariableArrays can be saved together in one .npz file.
+They share a single node table, so a Variable used by more than one of them
+(for example a trained parameter and an error depending on it) is stored once
+and is still shared after loading.
+
+Loading constructs each Variable directly from its stored value, d_op and operands,
+so no arithmetic is redone and no Python operator overloading is involved.
+Graphs are flattened and rebuilt iteratively, so deep graphs do not hit the recursion limit.
+"""
+
+import numpy as np
+from chain import *
+from variable import Variable
+from variable_array import VariableArray
+
+# Op-code i corresponds to OPS[i]; 0 marks an independent variable.
+OPS = [None, d_neg, d_add, d_sub, d_mul, d_truediv, d_pow, d_tanh]
+OP_CODES = dict((d_op, code) for code, d_op in enumerate(OPS))
+
+# Maximum number of operands of any d_op in OPS.
+MAX_OPERANDS = 2
+
+def topological_order(roots):
+    """
+    Returns a list of all Variables that a list of Variables depends on, including themselves.
+    Each Variable appears once, after all of its operands.
+    """
+    visited = set()
+    nodes = []
+    for root in roots:
+        # Iterative post-order traversal: operands are listed before their users.
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in visited:
+                continue
+            if expanded or node.operands is None:
+                visited.add(id(node))
+                nodes.append(node)
+            else:
+                stack.append((node, True))
+                for operand in reversed(node.operands):
+                    if id(operand) not in visited:
+                        stack.append((operand, False))
+    return nodes
+
+def flatten(roots, nodes=None):
+    """
+    Flattens the dependency graphs of a list of Variables into flat arrays.
+    nodes is the topological_order of roots; it is computed if not given.
+    Returns (ops, operands, values, indices), where ops, operands and values
+    are the op-code, operand-index and value arrays described above,
+    and indices[r] is the node index of roots[r].
+    Raises an error if a Variable has a d_op that cannot be serialized.
+    """
+    if nodes is None:
+        nodes = topological_order(roots)
+    index = dict((id(node), n) for n, node in enumerate(nodes))
+
+    ops = np.empty(len(nodes), dtype=np.int8)
+    operands = np.full((len(nodes), MAX_OPERANDS), -1, dtype=np.int64)
+    values = np.empty(len(nodes))
+    for n, node in enumerate(nodes):
+        if node.d_op not in OP_CODES:
+            raise(Exception("Cannot serialize d_op %s" % node.d_op))
+        ops[n] = OP_CODES[node.d_op]
+        values[n] = node.value
+        if node.operands is not None:
+            for o, operand in enumerate(node.operands):
+                operands[n, o] = index[id(operand)]
+    indices = np.array([index[id(root)] for root in roots], dtype=np.int64)
+    return ops, operands, values, indices
+
+def unflatten(ops, operands, values):
+    """
+    Rebuilds Variables from the flat arrays produced by flatten.
+    Returns a list of Variables, one per node, in the same order as the arrays.
+    """
+    ops = ops.tolist()
+    operands = operands.tolist()
+    values = values.tolist()
+    nodes = []
+    for n in range(len(ops)):
+        if ops[n] == 0:
+            nodes.append(Variable(value=values[n]))
+        else:
+            nodes.append(Variable(
+                value = values[n],
+                d_op = OPS[ops[n]],
+                operands = [nodes[o] for o in operands[n] if o >= 0]))
+    return nodes
+
+def save(file, **graphs):
+    """
+    Saves named Variables and/or VariableArrays to file in .npz format.
+    file is a filename or an open file object, as for numpy.savez.
+    For example, save("model.npz", W=W, e=e) stores W and e and all their dependencies.
+    """
+    names = sorted(graphs)
+    roots = []
+    shapes = {}
+    for name in names:
+        if isinstance(graphs[name], VariableArray):
+            shapes[name] = graphs[name].shape
+            roots.extend(graphs[name].flat)
+        else:
+            roots.append(graphs[name])
+    ops, operands, values, indices = flatten(roots)
+
+    arrays = {"ops": ops, "operands": operands, "values": values}
+    start = 0
+    for name in names:
+        if name in shapes:
+            size = int(np.prod(shapes[name]))
+            arrays["array/" + name] = indices[start:start+size].reshape(shapes[name])
+        else:
+            size = 1
+            arrays["scalar/" + name] = indices[start]
+        start += size
+    np.savez(file, **arrays)
+
+def load(file):
+    """
+    Loads Variables and VariableArrays saved by save from file.
+    Returns a dictionary mapping each saved name to its Variable or VariableArray.
+    """
+    with np.load(file) as data:
+        nodes = unflatten(data["ops"], data["operands"], data["values"])
+        graphs = {}
+        for key in data.files:
+            kind, _, name = key.partition("/")
+            if kind == "scalar":
+                graphs[name] = nodes[int(data[key])]
+            elif kind == "array":
+                indices = data[key]
+                variable_array = np.empty(indices.shape, dtype=object)
+                for a in range(indices.size):
+                    variable_array.flat[a] = nodes[indices.flat[a]]
+                graphs[name] = variable_array.view(VariableArray)
+    return graphs
+
+if __name__ == "__main__":
+
+    """
+    Scratch pad for informal testing.
+    You can edit the following without affecting the tests.
+    """
+
+    import io
+
+    W = VariableArray(np.arange(4.).reshape((2,2)))
+    e = (W[0,0] * W[1,1] - W[0,1]).tanh()
+    f = io.BytesIO()
+    save(f, W=W, e=e)
+    f.seek(0)
+    loaded = load(f)
+    print(loaded["W"])
+    print(loaded["e"])
+    print(loaded["W"].gradient(loaded["e"]))
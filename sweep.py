@@ -0,0 +1,206 @@
+"""
+Provides a hyperparameter sweep runner for learn.gradient_descent.
+A sweep trains the same model once per configuration,
+where a configuration is a dictionary with "learning_rate" and "num_iters" entries.
+Configurations can be listed by hand, or generated with grid or random_configs.
+
+The training runs are independent, so they are run in parallel on a process pool.
+The training data arrays are copied once into shared memory,
+and every worker process reads them from there instead of receiving its own copy.
+Errors are streamed back from the workers as each iteration finishes.
+Configurations whose error is clearly worse than the best seen at the same iteration
+can be cancelled early, freeing their worker for the remaining configurations.
+
+The error function and parameters are sent to the worker processes,
+so error_function must be picklable (for example, defined at module level).
+If it is not, or if a worker process dies, sweep raises an error rather than waiting forever.
+"""
+
+import itertools
+import math
+import os
+import queue as queue_module
+import random
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from variable_array import VariableArray
+from learn import gradient_descent
+
+# Seconds to wait for a result before checking whether the workers are still alive.
+POLL_INTERVAL = 0.1
+
+def grid(**axes):
+    """
+    Returns a list of configurations with every combination of the given values.
+    For example, grid(learning_rate=[0.01, 0.1], num_iters=[10])
+    returns [{"learning_rate": 0.01, "num_iters": 10}, {"learning_rate": 0.1, "num_iters": 10}].
+    """
+    names = sorted(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*[axes[name] for name in names])]
+
+def random_configs(num_configs, learning_rate, num_iters, seed=None):
+    """
+    Returns a list of num_configs randomly sampled configurations.
+    learning_rate is a (low, high) range, sampled uniformly on a log scale.
+    num_iters is a (low, high) range of integers, sampled uniformly (inclusive).
+    seed seeds the random number generator, for reproducible sweeps.
+    """
+    rng = random.Random(seed)
+    low, high = math.log(learning_rate[0]), math.log(learning_rate[1])
+    return [{"learning_rate": math.exp(rng.uniform(low, high)),
+             "num_iters": rng.randint(num_iters[0], num_iters[1])}
+            for c in range(num_configs)]
+
+# State of a worker process, set up by _initialize.
+_data = None
+_buffers = None
+_queue = None
+_cancelled = None
+_pids = None
+
+def _initialize(specs, queue, cancelled, pids):
+    """
+    Sets up a worker process.
+    Attaches to the shared memory described by specs and wraps it in read-only numpy.ndarrays.
+    """
+    global _data, _buffers, _queue, _cancelled, _pids
+    _data = {}
+    _buffers = []
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _buffers.append(shm)
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        array.flags.writeable = False
+        _data[name] = array
+    _queue = queue
+    _cancelled = cancelled
+    _pids = pids
+
+def _train(index, config, initial_values, error_function):
+    """
+    Runs gradient descent for one configuration in a worker process.
+    Records the worker's process id, so the parent can tell if the worker dies.
+    Sends (index, i, error) to the parent at each iteration i,
+    and (index, None, None) when finished or cancelled.
+    """
+    def callback(i, e):
+        if _cancelled[index]:
+            return True
+        _queue.put((index, i, float(e.evaluate())))
+        return False
+
+    _pids[index] = os.getpid()
+    parameters = [VariableArray(value) for value in initial_values]
+    try:
+        gradient_descent(parameters, lambda p: error_function(p, _data),
+                         config["num_iters"], config["learning_rate"], callback=callback)
+    finally:
+        _queue.put((index, None, None))
+
+def _alive(pid):
+    """
+    Returns whether the process with id pid is still running.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+def sweep(initial_values, error_function, data, configs, processes=None, cancel_ratio=None, min_iters=1):
+    """
+    Runs gradient descent once per configuration on a process pool.
+    initial_values is a list of numpy.ndarrays of initial parameter values;
+    each run starts from its own VariableArrays with these values.
+    error_function(parameters, data) should return a single Variable e, as for gradient_descent,
+    where data is a dictionary of read-only numpy.ndarrays.
+    data is a dictionary of numpy.ndarrays of training data, placed once in shared memory.
+    configs is a list of configurations.
+    processes is the number of worker processes (by default, the number of CPUs).
+    If cancel_ratio is given, a configuration is cancelled once its error at an iteration
+    i >= min_iters is more than cancel_ratio times the lowest error seen at iteration i.
+
+    This is a generator, yielding (index, i, error) as results arrive,
+    where error is the float error of configs[index] at the start of its i^{th} iteration.
+    No more results are yielded for a configuration after it is cancelled.
+    Closing the generator early cancels all remaining configurations.
+    Raises an error as soon as it is seen while waiting for results, even if other
+    configurations are still running: the error raised by a configuration's training,
+    an error sending a configuration to a worker, or the death of a worker process.
+    The remaining configurations are then cancelled.
+    """
+    buffers = []
+    try:
+        specs = {}
+        for name, array in data.items():
+            array = np.ascontiguousarray(array)
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            buffers.append(shm)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+            specs[name] = (shm.name, array.shape, array.dtype.str)
+
+        queue = mp.Queue()
+        cancelled = mp.Array("b", len(configs), lock=False)
+        pids = mp.Array("l", len(configs), lock=False)
+        pool = mp.Pool(processes, _initialize, (specs, queue, cancelled, pids))
+        try:
+            # A task that fails before or outside _train (for example, because its
+            # arguments cannot be pickled) still needs to report that it is finished.
+            results = [pool.apply_async(_train, (index, config, initial_values, error_function),
+                           error_callback=lambda error, index=index: queue.put((index, None, None)))
+                       for index, config in enumerate(configs)]
+            best = []
+            finished = set()
+            while len(finished) < len(configs):
+                try:
+                    index, i, error = queue.get(timeout=POLL_INTERVAL)
+                except queue_module.Empty:
+                    for index in range(len(configs)):
+                        if results[index].ready():
+                            results[index].get()
+                        elif index not in finished and pids[index] and not _alive(pids[index]):
+                            raise(Exception("Worker process for configuration %d died" % index))
+                    continue
+                if i is None:
+                    finished.add(index)
+                    continue
+                if cancelled[index]:
+                    continue
+                yield index, i, error
+                while len(best) <= i:
+                    best.append(float("inf"))
+                best[i] = min(best[i], error)
+                if cancel_ratio is not None and i >= min_iters and error > cancel_ratio * best[i]:
+                    cancelled[index] = 1
+            for result in results:
+                result.get()
+        finally:
+            for index in range(len(configs)):
+                cancelled[index] = 1
+            pool.terminate()
+            pool.join()
+    finally:
+        for shm in buffers:
+            shm.close()
+            shm.unlink()
+
+if __name__ == "__main__":
+
+    """
+    Scratch pad for informal testing.
+    You can edit the following without affecting the tests.
+    Sweeps the learning rate of the linear regression example in learn.py.
+    """
+
+    def error_function(params, data):
+        return sum(((params[0].dot(data["X"]) - data["Y"])**2).flat)
+
+    data = {"X": np.random.randn(2,4), "Y": np.random.randn(2,4)}
+    configs = grid(learning_rate=[0.001, 0.01, 0.1, 0.5], num_iters=[10])
+    final = {}
+    for index, i, error in sweep([np.zeros((2,2))], error_function, data, configs, cancel_ratio=2.):
+        final[index] = (i, error)
+        print(index, i, error)
+    for index, config in enumerate(configs):
+        print(config, "stopped at iteration %d with error %f" % final[index])
@@ -1,9 +1,17 @@
+import io
 import math
+import os
 import unittest as ut
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from variable import Variable
 from variable_array import VariableArray
-from learn import gradient_descent
+from learn import gradient_descent, optimize
+from optimizers import SGD, Nesterov, RMSProp, Adam
+from serialize import save, load
+from graph import Graph
+from sweep import sweep, grid, random_configs
+from learn_problem import LEARN_X, LEARN_Y, LEARN_W, LEARN_E
 
 TOL = 0.0001
 
@@ -174,6 +182,172 @@ class LearnTestCase(ADTestCase):
         for e in range(len(errors)):
             self.assertRoughlyEqual(E[e].evaluate(), errors[e].evaluate())
 
+class SerializeTestCase(ADTestCase):
+
+    def roundtrip(self, **graphs):
+        f = io.BytesIO()
+        save(f, **graphs)
+        f.seek(0)
+        return load(f)
+
+    def test_0(self):
+        x, y = Variable(2.), Variable(3.)
+        z = (x * y - x / y) ** 2 + (-x).tanh()
+        loaded = self.roundtrip(x=x, y=y, z=z)
+        self.assertRoughlyEqual(loaded["z"].evaluate(), z.evaluate())
+        self.assertRoughlyEqual(loaded["z"].derivative(loaded["x"]), z.derivative(x))
+        self.assertRoughlyEqual(loaded["z"].derivative(loaded["y"]), z.derivative(y))
+
+    def test_1(self):
+        W = VariableArray(np.array([[1., 2.], [3., 4.]]))
+        e = W[0,0] * W[1,1] - W[0,1] * W[1,0]
+        loaded = self.roundtrip(W=W, e=e)
+        self.assertIsInstance(loaded["W"], VariableArray)
+        self.assertArraysRoughlyEqual(loaded["W"].evaluate(), W.evaluate())
+        self.assertArraysRoughlyEqual(loaded["W"].gradient(loaded["e"]), W.gradient(e))
+
+    def test_2(self):
+        x = Variable(1.)
+        y = x
+        for i in range(5000):
+            y = y + x
+        loaded = self.roundtrip(y=y)
+        self.assertRoughlyEqual(loaded["y"].evaluate(), 5001.)
+
+class GraphTestCase(ADTestCase):
+
+    def test_0(self):
+        x, y = Variable(2.), Variable(3.)
+        z = (x * y - x / y) ** 2 + (-x).tanh() - 2 ** y
+        g = Graph(z)
+        self.assertRoughlyEqual(g.evaluate(), z.evaluate())
+        self.assertRoughlyEqual(g.derivative(x), z.derivative(x))
+        self.assertRoughlyEqual(g.derivative(y), z.derivative(y))
+
+    def test_1(self):
+        x, y = Variable(2.), Variable(3.)
+        z = x * x * y
+        g = Graph(z)
+        self.assertRoughlyEqual(g.evaluate({x: 4.}), 48.)
+        self.assertRoughlyEqual(g.derivative(x, {x: 4.}), 24.)
+        self.assertRoughlyEqual(g.derivative(y, {x: 4., y: 1.}), 16.)
+        self.assertRoughlyEqual(x.evaluate(), 2.)
+        self.assertRoughlyEqual(g.evaluate(), 12.)
+
+    def test_2(self):
+        v = VariableArray(np.array([1., 2., 3.]))
+        z = v[0] * v[1] + (v[2] ** 2).tanh()
+        g = Graph(z)
+        values = np.array([-1., 0.5, 0.2])
+        self.assertArraysRoughlyEqual(g.derivative(v), v.gradient(z))
+        v.assign(values)
+        z = v[0] * v[1] + (v[2] ** 2).tanh()
+        self.assertArraysRoughlyEqual(g.derivative(v, [(v, values)]), v.gradient(z))
+
+    def test_3(self):
+        x = Variable(1.)
+        z = x * 2.
+        g = Graph(z)
+        self.assertRaises(Exception, g.evaluate, {z: 1.})
+        self.assertRoughlyEqual(g.derivative(Variable(1.)), 0.)
+
+    def test_4(self):
+        x, y = Variable(0.), Variable(0.)
+        g = Graph((x * y).tanh() + x ** 3)
+        def call(a):
+            return g.derivative(x, {x: a, y: 2. * a})
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(call, [0.1 * a for a in range(100)]))
+        for a, result in enumerate(results):
+            a *= 0.1
+            expected = (1 - math.tanh(2. * a * a) ** 2) * 2. * a + 3. * a ** 2
+            self.assertRoughlyEqual(result, expected)
+
+class OptimizeTestCase(ADTestCase):
+
+    def test_0(self):
+        X, Y = LEARN_X, LEARN_Y
+        W = [VariableArray(w) for w in LEARN_W]
+        W0, W1 = W
+        E = LEARN_E
+
+        def error_function(parameters):
+            return sum(((parameters[1].dot(np.tanh(parameters[0].dot(X))) - Y)**2).flat)
+
+        # Plain SGD takes the same steps as gradient_descent.
+        errors = optimize(W, error_function, SGD(0.01), num_iters=10)
+        for e in range(len(errors)):
+            self.assertRoughlyEqual(E[e], errors[e])
+        self.assertIs(W[0], W0)
+        self.assertIs(W[1], W1)
+        self.assertRoughlyEqual(error_function(W).evaluate(), 0.6337863)
+
+    def test_1(self):
+        for optimizer in [SGD(0.1, momentum=0.5), Nesterov(0.1), RMSProp(0.1), Adam(0.1)]:
+            x = Variable(3.)
+            v = VariableArray(np.array([1., -0.5]))
+            def error_function(parameters):
+                x, v = parameters
+                return (x - 1.) ** 2 + (v[0] + 2.) ** 2 + (v[1] * x) ** 2
+            errors = optimize([x, v], error_function, optimizer, num_iters=200)
+            self.assertTrue(errors[-1] < 0.01 * errors[0])
+            self.assertTrue(error_function([x, v]).evaluate() <= errors[-1])
+
+def sweep_error_function(parameters, data):
+    return sum(((parameters[0].dot(data["X"]) - data["Y"])**2).flat)
+
+def sweep_exit_function(parameters, data):
+    os._exit(1)
+
+def sweep_raise_function(parameters, data):
+    raise(ValueError("error in training"))
+
+class SweepTestCase(ADTestCase):
+
+    def test_0(self):
+        configs = grid(learning_rate=[0.01, 0.1], num_iters=[3, 5])
+        self.assertEqual(len(configs), 4)
+        self.assertEqual(configs[1], {"learning_rate": 0.01, "num_iters": 5})
+        configs = random_configs(10, learning_rate=(0.001, 0.1), num_iters=(5, 10), seed=0)
+        self.assertEqual(configs, random_configs(10, (0.001, 0.1), (5, 10), seed=0))
+        for config in configs:
+            self.assertTrue(0.001 <= config["learning_rate"] <= 0.1)
+            self.assertTrue(5 <= config["num_iters"] <= 10)
+
+    def test_1(self):
+        data = {"X": LEARN_X, "Y": LEARN_Y}
+        configs = grid(learning_rate=[0.01, 0.1], num_iters=[4])
+        errors = dict((index, {}) for index in range(len(configs)))
+        for index, i, error in sweep([np.zeros((2,2))], sweep_error_function, data, configs, processes=2):
+            errors[index][i] = error
+        for index, config in enumerate(configs):
+            W = [VariableArray(np.zeros((2,2)))]
+            expected = gradient_descent(W, lambda p: sweep_error_function(p, data),
+                                        config["num_iters"], config["learning_rate"])
+            self.assertEqual(sorted(errors[index]), list(range(config["num_iters"])))
+            for i in range(config["num_iters"]):
+                self.assertRoughlyEqual(errors[index][i], expected[i].evaluate())
+
+    def test_2(self):
+        data = {"X": LEARN_X, "Y": LEARN_Y}
+        configs = [{"learning_rate": 0.1, "num_iters": 10}, {"learning_rate": 0.5, "num_iters": 10}]
+        counts = [0, 0]
+        for index, i, error in sweep([np.zeros((2,2))], sweep_error_function, data, configs,
+                                     processes=1, cancel_ratio=2., min_iters=1):
+            counts[index] += 1
+        self.assertEqual(counts, [10, 2])
+
+    def test_3(self):
+        data = {"X": LEARN_X, "Y": LEARN_Y}
+        configs = grid(learning_rate=[0.01], num_iters=[4])
+        error_function = lambda parameters, data: sweep_error_function(parameters, data)
+        with self.assertRaises(Exception):
+            list(sweep([np.zeros((2,2))], error_function, data, configs, processes=1))
+        with self.assertRaises(Exception):
+            list(sweep([np.zeros((2,2))], sweep_exit_function, data, configs, processes=1))
+        with self.assertRaises(ValueError):
+            list(sweep([np.zeros((2,2))], sweep_raise_function, data, configs, processes=1))
+
 if __name__ == "__main__":
 
     test_suite = ut.TestLoader().loadTestsFromTestCase(NegTestCase)
@@ -205,3 +379,15 @@ if __name__ == "__main__":
 
     test_suite = ut.TestLoader().loadTestsFromTestCase(LearnTestCase)
     ut.TextTestRunner(verbosity=2).run(test_suite)
+
+    test_suite = ut.TestLoader().loadTestsFromTestCase(SerializeTestCase)
+    ut.TextTestRunner(verbosity=2).run(test_suite)
+
+    test_suite = ut.TestLoader().loadTestsFromTestCase(GraphTestCase)
+    ut.TextTestRunner(verbosity=2).run(test_suite)
+
+    test_suite = ut.TestLoader().loadTestsFromTestCase(OptimizeTestCase)
+    ut.TextTestRunner(verbosity=2).run(test_suite)
+
+    test_suite = ut.TestLoader().loadTestsFromTestCase(SweepTestCase)
+    ut.TextTestRunner(verbosity=2).run(test_suite)